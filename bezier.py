@@ -2,6 +2,7 @@
 Functions that calculate Bézier curves and surfaces.
 """
 
+from functools import lru_cache
 import math
 
 import numpy as np
@@ -12,53 +13,53 @@ def bernstein_poly(u: np.ndarray, k: int, n: int) -> np.ndarray:
     return combination(n, k) * (u ** k) * ((1 - u) ** (n - k))
 
 
-def curve(cp, num):
+@lru_cache(maxsize=128)
+def basis_matrix(num: int, n: int) -> np.ndarray:
+    """Return the Bernstein basis matrix of degree `n` evaluated at `num` evenly spaced parameters, with shape (num, n+1). Results are cached because they depend only on `num` and `n`, and are shared by all geometries with the same numbers of nodes and control points."""
     u = np.linspace(0, 1, num)
-    n = cp.shape[1] - 1
-    M = np.array([bernstein_poly(u, k, n) for k in range(0, n + 1)]).transpose()
+    basis = np.array([bernstein_poly(u, k, n) for k in range(0, n + 1)]).transpose()
+    # Prevent the cached array from being modified.
+    basis.flags.writeable = False
+    return basis
+
+
+def curve(cp, num, M=None):
+    if M is None:
+        M = basis_matrix(num, cp.shape[1] - 1)
     nodes = M @ cp.transpose()
 
     return nodes.transpose()
 
 
-def surface(cp, num_u, num_v):
-    u = np.linspace(0, 1, num_u)
-    v = np.linspace(0, 1, num_v)
-    n_u = cp.shape[1] - 1
-    n_v = cp.shape[2] - 1
-    M_u = np.array([bernstein_poly(u, k, n_u) for k in range(0, n_u + 1)]).transpose()
-    M_v = np.array([bernstein_poly(v, k, n_v) for k in range(0, n_v + 1)])
-    nodes = M_u @ cp @ M_v
+def surface(cp, num_u, num_v, M_u=None, M_v=None):
+    if M_u is None:
+        M_u = basis_matrix(num_u, cp.shape[1] - 1)
+    if M_v is None:
+        M_v = basis_matrix(num_v, cp.shape[2] - 1)
+    nodes = M_u @ cp @ M_v.transpose()
 
     return nodes
 
 
 def BezierCurveContinuity(cp1, cp2):
     """Return the continuity of two Bézier curves as a tuple: (str, int), or return None if no continuity exists."""
-    diffcp1 = []
-    diffcp2 = []
-    for x, y in zip(cp1[:, :, 0].T[0::], cp1[:, :, 0].T[1::]):
-        diffcp1.append(y - x)
-    for x, y in zip(cp2[:, :, 0].T[0::], cp2[:, :, 0].T[1::]):
-        diffcp2.append(y - x)
-    diff2cp1 = []
-    diff2cp2 = []
-    for x, y in zip(diffcp1[0::], diffcp1[1::]):
-        diff2cp1.append(y - x)
-    for x, y in zip(diffcp2[0::], diffcp2[1::]):
-        diff2cp2.append(y - x)
+    # First and second differences between consecutive control points, with shape (3, number of differences).
+    diffcp1 = np.diff(cp1[:, :, 0], axis=1)
+    diffcp2 = np.diff(cp2[:, :, 0], axis=1)
+    diff2cp1 = np.diff(diffcp1, axis=1)
+    diff2cp2 = np.diff(diffcp2, axis=1)
 
     if (cp1[:, -1, :] == cp2[:, 0, :]).all() or (cp2[:, -1, :] == cp1[:, 0, :]).all():
-        if (diffcp1[len(diffcp1) - 1] == diffcp2[0]).all() or (diffcp2[len(diffcp2) - 1] == diffcp1[0]).all():
-            if (diff2cp1[len(diff2cp1) - 1] == diff2cp2[0]).all() or (diff2cp2[len(diff2cp2) - 1] == diff2cp1[0]).all():
+        if (diffcp1[:, -1] == diffcp2[:, 0]).all() or (diffcp2[:, -1] == diffcp1[:, 0]).all():
+            if (diff2cp1[:, -1] == diff2cp2[:, 0]).all() or (diff2cp2[:, -1] == diff2cp1[:, 0]).all():
                 return ('C', 2)
             return ('C', 1)
-        div1 = diffcp1[len(diffcp1) - 1] / diffcp2[0]
+        div1 = diffcp1[:, -1] / diffcp2[:, 0]
         nan_array = np.isnan(div1)
         not_nan_array = ~ nan_array
         div1 = div1[not_nan_array]
 
-        div2 = diffcp2[len(diffcp2) - 1] / diffcp1[0]
+        div2 = diffcp2[:, -1] / diffcp1[:, 0]
         nan_array = np.isnan(div2)
         not_nan_array = ~ nan_array
         div2 = div2[not_nan_array]
@@ -60,10 +60,8 @@ def basis(u: np.ndarray, i: np.ndarray, k: int, knots: np.ndarray) -> np.ndarray
 #     plt.xticks(range(n+1))
 # plt.show()
 
-def curve(cp: np.ndarray, number_u: int, k: int) -> np.ndarray:
-    """Return an array of nodes with shape (3, u, 1)."""
-    # Number of segments.
-    n = cp.shape[1] - 1
+def basis_matrix(number_u: int, n: int, k: int) -> np.ndarray:
+    """Return the basis matrix for `n+1` control points evaluated at `number_u` evenly spaced parameters, with shape (number_u, n+1)."""
     # Length of knots vector.
     T = n + k + 1
     # Knot vector with the appropriate number of repeated values at the beginning and end.
@@ -75,33 +73,24 @@ def curve(cp: np.ndarray, number_u: int, k: int) -> np.ndarray:
     u = np.linspace(0, knots[-1], number_u).reshape((number_u, 1))
     # Segment indices.
     i = np.arange(n+1)
+    return basis(u, i, k, knots)
+
+def curve(cp: np.ndarray, number_u: int, k: int, M: np.ndarray = None) -> np.ndarray:
+    """Return an array of nodes with shape (3, u, 1). A previously calculated basis matrix `M` can be given to avoid recalculating it."""
+    if M is None:
+        M = basis_matrix(number_u, cp.shape[1] - 1, k)
     # Calculate nodes.
-    nodes = basis(u, i, k, knots) @ cp
+    nodes = M @ cp
     return nodes
 
-def surface(cp: np.ndarray, number_u: int, number_v: int, k: int) -> np.ndarray:
-    """Return an array of nodes with shape (3, u, v)."""
-    # Number of segments in each direction.
-    m = cp.shape[1] - 1
-    n = cp.shape[2] - 1
-    # Lengths of knots vectors.
-    T_u = m + k + 1
-    T_v = n + k + 1
-    # Knot vectors with the appropriate numbers of repeated values at the beginning and end.
-    padding = k - 1
-    knots_u = np.arange(T_u - padding*2)
-    knots_v = np.arange(T_v - padding*2)
-    assert 0 not in (knots_u.size, knots_v.size), f"The order {k} is too high for the number of control points {n+1}."
-    knots_u = np.pad(knots_u, padding, mode="edge")
-    knots_v = np.pad(knots_v, padding, mode="edge")
-    # Interpolation points.
-    u = np.linspace(0, knots_u[-1], number_u).reshape((number_u, 1))
-    v = np.linspace(0, knots_v[-1], number_v).reshape((number_v, 1))
-    # Segment indices.
-    i = np.arange(m+1)
-    j = np.arange(n+1)
+def surface(cp: np.ndarray, number_u: int, number_v: int, k: int, M_u: np.ndarray = None, M_v: np.ndarray = None) -> np.ndarray:
+    """Return an array of nodes with shape (3, u, v). Previously calculated basis matrices `M_u` and `M_v` can be given to avoid recalculating them."""
+    if M_u is None:
+        M_u = basis_matrix(number_u, cp.shape[1] - 1, k)
+    if M_v is None:
+        M_v = basis_matrix(number_v, cp.shape[2] - 1, k)
     # Calculate nodes.
-    nodes = basis(u, i, k, knots_u) @ cp @ basis(v, j, k, knots_v).transpose()
+    nodes = M_u @ cp @ M_v.transpose()
     return nodes
 
 def continuity_of_curves(cp_1: np.ndarray, cp_2: np.ndarray) -> Tuple[str, int]:
@@ -9,6 +9,7 @@ from typing import Tuple
 
 import numpy as np
 import vtk
+from vtk.util import numpy_support
 
 import bezier
 import hermite
@@ -31,10 +32,10 @@ class Geometry(ABC):
     # The number of instances of the class, incremented each time a new instance is created. Each subclass inherits this variable and increments it independently of other subclasses.
     instances = 0
 
-    # Default color of control point actors.
-    color_default_cp = [_*255 for _ in BLUE]
-    color_highlight_cp = [255*0.8 + _*0.2 for _ in color_default_cp]
-    color_lines_cp = [_*255 for _ in GRAY_50]
+    # Default color of control point actors, stored as 8-bit values to match the VTK color arrays.
+    color_default_cp = np.array([round(_*255) for _ in BLUE], dtype=np.uint8)
+    color_highlight_cp = np.array([round(255*0.8 + _*0.2) for _ in color_default_cp], dtype=np.uint8)
+    color_lines_cp = np.array([round(_*255) for _ in GRAY_50], dtype=np.uint8)
 
     # Property objects that define the default and highlighted appearances of nodes actors.
     property_default_surface = vtk.vtkProperty()
@@ -62,18 +63,27 @@ class Geometry(ABC):
     property_highlight_curve.SetLineWidth(5)
 
     def __init__(self, cp: np.ndarray, number_u: int = None, number_v: int = None, order: int = None):
-        self.cp = cp.astype(float)
+        # Copy the control points into a C-contiguous array, because presets are often transposed views of arrays written one point per row.
+        self.cp = np.array(cp, dtype=float, order="C")
         self.number_u = number_u
         self.number_v = number_v
         self.order = order
+        # Basis matrices and the parameters they were calculated with. They are reused until the numbers of nodes, the order, or the number of control points change.
+        self.basis = None
+        self.basis_key = None
+        # Whether inputs have been stored by a deferred update but not yet used to recalculate the geometry, and whether that recalculation requires the VTK objects to be resized.
+        self.is_outdated = False
+        self.requires_reset = False
         # Calculate nodes and the order.
-        self.nodes = self.calculate(self.cp, self.number_u, self.number_v, self.order)
+        self.nodes = self.calculate_nodes()
         if self.order is None:
             self.order = self.get_order()
 
         # Set the instance number, used to differentiate between different instances of the same type of geometry on the GUI.
         self.increment_instances()
         self.instance = self.instances
+        # The name shown on the GUI, which never changes after the instance number is set.
+        self.name = f"{self.geometry_name} {self.geometry_type} {self.instance}"
 
         # Objects used to store coordinate point data.
         self.points_cp = vtk.vtkPoints()
@@ -106,20 +116,30 @@ class Geometry(ABC):
         self.actor_cp.GetProperty().SetPointSize(15)
         self.actor_cp.GetProperty().SetLineWidth(1)
 
+        # The default and highlighted properties of the nodes actor. These are shared by all geometries of the same type, so that changing the appearance only requires swapping the property of the actor.
+        if isinstance(self, Curve):
+            self.property_default_nodes = Geometry.property_default_curve
+            self.property_highlight_nodes = Geometry.property_highlight_curve
+        else:
+            self.property_default_nodes = Geometry.property_default_surface
+            self.property_highlight_nodes = Geometry.property_highlight_surface
+
         self.actor_nodes = vtk.vtkActor()
         self.actor_nodes.SetMapper(mapper_nodes)
-        self.actor_nodes.GetProperty().DeepCopy(
-            Geometry.property_default_curve if isinstance(self, Curve) else Geometry.property_default_surface
-        )
+        self.actor_nodes.SetProperty(self.property_default_nodes)
+
+        # Store a reference to this object in each actor, so that the geometry of a picked actor can be accessed directly.
+        self.actor_cp.geometry = self
+        self.actor_nodes.geometry = self
     
     @classmethod
     def increment_instances(cls):
         cls.instances += 1
 
-    def update(self, cp: np.ndarray = None, number_u: int = None, number_v: int = None, order: int = None) -> None:
-        """Recalculate the geometry if the user modified information in the GUI."""
-        # Whether the number of control points or nodes has changed.
-        requires_reset = (
+    def update(self, cp: np.ndarray = None, number_u: int = None, number_v: int = None, order: int = None, defer: bool = False) -> None:
+        """Recalculate the geometry if the user modified information in the GUI. If `defer` is True, only store the given inputs and recalculate when `flush` is called, so that consecutive rapid updates are recalculated only once."""
+        # Whether the number of control points or nodes has changed since the last recalculation.
+        self.requires_reset = self.requires_reset or (
             number_u is not None and number_u != self.number_u or
             number_v is not None and number_v != self.number_v or
             cp is not None and cp.shape != self.cp.shape
@@ -134,35 +154,59 @@ class Geometry(ABC):
             self.number_v = number_v
         if order is not None:
             self.order = order
+        self.is_outdated = True
+
+        if not defer:
+            self.flush()
+    
+    def flush(self) -> None:
+        """Recalculate the geometry using the inputs stored by any deferred updates."""
+        if not self.is_outdated:
+            return
         
         # Calculate nodes and the order.
-        self.nodes = self.calculate(self.cp, self.number_u, self.number_v, self.order)
+        self.nodes = self.calculate_nodes()
         self.order = self.get_order()
-        if requires_reset:
+        if self.requires_reset:
             self.reset_data()
         else:
             self.update_data()
-    
-    def update_single_cp(self, point: np.ndarray, point_id: int) -> None:
-        """Update the control point with the given point ID."""
+        self.is_outdated = False
+        self.requires_reset = False
+    
+    def update_single_cp(self, point: np.ndarray, point_id: int, defer: bool = False) -> None:
+        """Update the control point with the given point ID. If `defer` is True, recalculate when `flush` is called."""
+        # Apply any deferred changes to the number of control points or nodes first so that point IDs refer to the current control points.
+        if self.requires_reset:
+            self.flush()
         i, j = self.get_point_indices(point_id)
         self.cp[:, i, j] = point
-        self.update()
-        self.update_data()
+        self.update(defer=defer)
     
     def translate(self, translation: Tuple[float, float, float]) -> None:
         """Translate the entire shape."""
-        self.cp[0, ...] += translation[0]
-        self.cp[1, ...] += translation[1]
-        self.cp[2, ...] += translation[2]
+        # Add the translation to all control points in one broadcast operation.
+        self.cp += np.reshape(translation, (3, 1, 1))
         self.update()
-        self.update_data()
 
     @staticmethod
     @abstractmethod
     def calculate() -> np.ndarray:
         """Calculate and return all nodes in the geometry for the given control points and parameters."""
     
+    @staticmethod
+    def calculate_basis(cp_shape: tuple, number_u: int, number_v: int, order: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the basis matrices along u and v for the given parameters. Each is None if the geometry does not use a basis matrix along that direction."""
+        return None, None
+    
+    def calculate_nodes(self) -> np.ndarray:
+        """Calculate and return all nodes in the geometry, reusing the previously calculated basis matrices if only the control points have changed."""
+        key = (self.cp.shape, self.number_u, self.number_v, self.order)
+        if key != self.basis_key:
+            self.basis = self.calculate_basis(*key)
+            self.basis_key = key
+        return self.calculate(self.cp, self.number_u, self.number_v, self.order, self.basis)
+    
     @abstractmethod
     def get_order(self) -> int:
         """Return the order of the geometry."""
@@ -190,110 +234,113 @@ class Geometry(ABC):
     def update_data(self) -> None:
         """Update data stored in VTK objects. Used when the numbers of control points or nodes do not change."""
         # Update control points.
-        k = 0
-        for i in range(self.cp.shape[1]):
-            for j in range(self.cp.shape[2]):
-                self.points_cp.SetPoint(self.ids_cp[k], self.cp[:, i , j])
-                k += 1
-        self.points_cp.Modified()
+        self.fill_points(self.points_cp, self.cp)
         self.actor_cp.GetMapper().Update()
         
         # Update nodes.
-        k = 0
-        for i in range(self.nodes.shape[1]):
-            for j in range(self.nodes.shape[2]):
-                self.points_nodes.SetPoint(self.ids_nodes[k], self.nodes[:, i, j])
-                k += 1
-        self.points_nodes.Modified()
+        self.fill_points(self.points_nodes, self.nodes)
         self.actor_nodes.GetMapper().Update()
     
     def reset_data(self) -> None:
-        """Create new VTK objects to store data. Used when changing the number of control points or nodes, which requires new vtkPoints objects to be created."""
-
-        del self.points_cp, self.points_nodes, self.vertices_cp
-
-        # Initialize objects.
-        self.points_cp = vtk.vtkPoints()
-        self.points_nodes = vtk.vtkPoints()
-        self.ids_cp = []
-        self.ids_nodes = []
-        self.vertices_cp = vtk.vtkCellArray()
-        
-        # Add control points.
-        for i in range(self.cp.shape[1]):
-            for j in range(self.cp.shape[2]):
-                self.ids_cp.append(
-                    self.points_cp.InsertNextPoint(self.cp[:, i, j])
-                )
-                self.vertices_cp.InsertNextCell(1)
-                self.vertices_cp.InsertCellPoint(self.ids_cp[-1])
+        """Resize the VTK objects that store data and refill them. Used when changing the number of control points or nodes."""
+        number_cp = self.cp.shape[1] * self.cp.shape[2]
+        number_nodes = self.nodes.shape[1] * self.nodes.shape[2]
+        # Point IDs are numbered in the order the points are stored, ordered by u and then by v.
+        self.ids_cp = list(range(number_cp))
+        self.ids_nodes = list(range(number_nodes))
+        # Table of the indices to the control points array corresponding to each point ID, with shape (number of control points, 2).
+        i, j = np.meshgrid(np.arange(self.cp.shape[1]), np.arange(self.cp.shape[2]), indexing="ij")
+        self.point_indices = np.stack((i.ravel(), j.ravel()), axis=1)
+
+        # Add control points, reusing the existing objects instead of creating new ones.
+        self.points_cp.SetNumberOfPoints(number_cp)
+        self.fill_points(self.points_cp, self.cp)
+        self.vertices_cp.Reset()
+        for point_id in self.ids_cp:
+            self.vertices_cp.InsertNextCell(1)
+            self.vertices_cp.InsertCellPoint(point_id)
+        self.vertices_cp.Modified()
+        # Remove the cached cell structure so that it is rebuilt for the new vertices.
+        self.data_cp.DeleteCells()
         self.data_cp.SetPoints(self.points_cp)
         self.data_cp.SetVerts(self.vertices_cp)
 
         # Add nodes.
-        for i in range(self.nodes.shape[1]):
-            for j in range(self.nodes.shape[2]):
-                self.ids_nodes.append(
-                    self.points_nodes.InsertNextPoint(self.nodes[:, i, j])
-                )
+        self.points_nodes.SetNumberOfPoints(number_nodes)
+        self.fill_points(self.points_nodes, self.nodes)
         self.data_nodes.SetDimensions(self.nodes.shape[2], self.nodes.shape[1], 1)
         self.data_nodes.SetPoints(self.points_nodes)
 
-        # Add an array of colors to control point data. Specifying colors for individual control points allows one control point to have a different color from the rest when it is selected.
-        colors = vtk.vtkUnsignedCharArray()
-        colors.SetNumberOfComponents(3)
-        colors.SetNumberOfTuples(len(self.ids_cp))
-        for tuple_id in self.ids_cp:
-            colors.SetTuple(tuple_id, Geometry.color_default_cp)
-        self.data_cp.GetCellData().SetScalars(colors)
+        # Add lines between control points, if any.
+        lines = self.make_lines_cp()
+        self.data_cp.SetLines(lines)
+
+        # Add an array of colors to control point data and lines. Specifying colors for individual control points allows one control point to have a different color from the rest when it is selected.
+        self.set_colors_cp(lines.GetNumberOfCells())
+    
+    def make_lines_cp(self) -> vtk.vtkCellArray:
+        """Return the lines drawn between control points, which is empty by default. Subclasses override this to add lines."""
+        return vtk.vtkCellArray()
+    
+    def set_colors_cp(self, number_lines: int = 0) -> None:
+        """Set the colors of the control points and of the given number of lines added after the control points."""
+        number_cp = len(self.ids_cp)
+        colors = np.empty((number_cp + number_lines, 3), dtype=np.uint8)
+        colors[:number_cp] = Geometry.color_default_cp
+        colors[number_cp:] = Geometry.color_lines_cp
+        # Store the array because the VTK array shares its memory instead of copying it. The VTK array is also stored to mark it as modified without looking it up through the cell data.
+        self.colors_cp = colors
+        self.scalars_cp = numpy_support.numpy_to_vtk(colors, deep=False, array_type=vtk.VTK_UNSIGNED_CHAR)
+        self.data_cp.GetCellData().SetScalars(self.scalars_cp)
         self.data_cp.Modified()
 
+    def set_color_cp(self, point_id: int, color: np.ndarray) -> bool:
+        """Set the color of a single control point by writing into the array shared with the VTK scalars, and return whether the color changed. Point IDs that no longer exist, such as after the number of control points is reduced, are ignored."""
+        if 0 <= point_id < len(self.ids_cp) and np.any(self.colors_cp[point_id] != color):
+            self.colors_cp[point_id] = color
+            # Marking only the color array as modified is enough for the mapper to update, without invalidating the rest of the data.
+            self.scalars_cp.Modified()
+            return True
+        return False
+
+    @staticmethod
+    def fill_points(points: vtk.vtkPoints, array: np.ndarray) -> None:
+        """Copy all coordinates in an array with shape (3, u, v) into the already sized vtkPoints object, ordered by u and then by v. The coordinates are written directly into the memory of the vtkPoints object through a NumPy view."""
+        numpy_support.vtk_to_numpy(points.GetData())[:] = array.reshape(3, -1).transpose()
+        points.Modified()
+
     @abstractmethod
     def resize_cp(self, number_u: int, number_v: int):
         """Return a new control points array with a different number of control points."""
     
+    @staticmethod
+    def interpolation_weights(number_old: int, number_new: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the indices of the upper neighbors and the linear interpolation weights used to resample `number_old` evenly spaced values to `number_new` evenly spaced values."""
+        u_old = np.linspace(0, 1, number_old)
+        u_new = np.linspace(0, 1, number_new)
+        index = np.searchsorted(u_old, u_new).clip(1, number_old - 1)
+        weight = (u_new - u_old[index - 1]) / (u_old[index] - u_old[index - 1])
+        return index, weight
+    
     @staticmethod
     def resize_cp_1d(cp: np.ndarray, number_u: int) -> np.ndarray:
         """Return a new control points array with a different number of control points using interpolation on the existing control points. This preserves the overall shape of the geometry the user previously created."""
-        cp_new = np.empty((3, number_u, 1))
-        for i in range(3):
-            cp_new[i, :, 0] = np.interp(
-                np.linspace(0, 1, number_u),
-                np.linspace(0, 1, cp.shape[1]),
-                cp[i, :, 0],
-                )
-        return cp_new
+        index, weight = Geometry.interpolation_weights(cp.shape[1], number_u)
+        weight = weight[None, :, None]
+        return (1 - weight) * cp[:, index - 1, :] + weight * cp[:, index, :]
     
     @staticmethod
     def resize_cp_2d(cp: np.ndarray, number_u: int, number_v: int) -> np.ndarray:
         """Return a new control points array with a different number of control points using 2D interpolation on the existing control points. This preserves the overall shape of the geometry the user previously created."""
-        cp_1 = np.empty((3, number_u, cp.shape[2]))
-        for j in range(cp_1.shape[2]):
-            for xyz in range(3):
-                cp_1[xyz, :, j] = np.interp(
-                    np.linspace(0, 1, number_u),
-                    np.linspace(0, 1, cp.shape[1]),
-                    cp[xyz, :, j],
-                )
-        cp_2 = np.empty((3, number_u, number_v))
-        for i in range(cp_2.shape[1]):
-            for xyz in range(3):
-                cp_2[xyz, i, :] = np.interp(
-                    np.linspace(0, 1, number_v),
-                    np.linspace(0, 1, cp_1.shape[2]),
-                    cp_1[xyz, i, :],
-                )
-        return cp_2
+        cp_1 = Geometry.resize_cp_1d(cp, number_u)
+        index, weight = Geometry.interpolation_weights(cp_1.shape[2], number_v)
+        weight = weight[None, None, :]
+        return (1 - weight) * cp_1[:, :, index - 1] + weight * cp_1[:, :, index]
     
     def get_point_indices(self, point_id: int) -> Tuple[int, int]:
         """Return a tuple of indices to the control points array corresponding to the specified point ID. Each point's point ID is assumed to start from 0 and be numbered based on the order it was added."""
         assert point_id >= 0
-        # This geometry is a curve.
-        if isinstance(self, Curve):
-            return point_id, 0
-        # This geometry is a surface.
-        else:
-            return point_id // self.cp.shape[2], point_id % self.cp.shape[2]
+        return tuple(self.point_indices[point_id])
     
     def get_point(self, point_id: int) -> np.ndarray:
         """Return an array of the control point corresponding to the specified point ID."""
@@ -313,7 +360,7 @@ class Geometry(ABC):
         return self.actor_cp, self.actor_nodes
     
     def __repr__(self) -> str:
-        return f"{self.geometry_name} {self.geometry_type} {self.instance}"
+        return self.name
 
 class Curve(Geometry):
     geometry_type = "curve"
@@ -332,8 +379,12 @@ class Bezier(Geometry):
 
 class BezierCurve(Bezier, Curve):
     @staticmethod
-    def calculate(cp: np.ndarray, number_u: int, number_v: int, order: int):
-        return bezier.curve(cp, number_u)
+    def calculate(cp: np.ndarray, number_u: int, number_v: int, order: int, basis: tuple = (None, None)):
+        return bezier.curve(cp, number_u, basis[0])
+    
+    @staticmethod
+    def calculate_basis(cp_shape: tuple, number_u: int, number_v: int, order: int):
+        return bezier.basis_matrix(number_u, cp_shape[1] - 1), None
     
     def get_order(self) -> int:
         return self.cp.shape[1] - 1
@@ -343,30 +394,24 @@ class BezierCurve(Bezier, Curve):
         continuity = bezier.BezierCurveContinuity(cp_1, cp_2)
         return Continuity(*continuity) if continuity is not None else Continuity()
     
-    def reset_data(self) -> None:
-        """Extend the base class method to add lines between control points."""
-        super().reset_data()
-
-        # Add lines.
+    def make_lines_cp(self) -> vtk.vtkCellArray:
+        """Override the base class method to add lines between control points."""
         lines = vtk.vtkCellArray()
         for i, point_id in enumerate(self.ids_cp):
             if i == 0:
                 continue
             else:
                 lines.InsertNextCell(2, [self.ids_cp[i-1], point_id])
-        self.data_cp.SetLines(lines)
-        
-        # Set line colors.
-        colors = self.data_cp.GetCellData().GetScalars()
-        for i in range(lines.GetNumberOfCells()):
-            tuple_id = i + len(self.ids_cp)
-            colors.InsertTuple(tuple_id, Geometry.color_lines_cp)
-        self.data_cp.Modified()
+        return lines
 
 class BezierSurface(Bezier, Surface):
     @staticmethod
-    def calculate(cp: np.ndarray, number_u: int, number_v: int, _):
-        return bezier.surface(cp, number_u, number_v)
+    def calculate(cp: np.ndarray, number_u: int, number_v: int, _, basis: tuple = (None, None)):
+        return bezier.surface(cp, number_u, number_v, *basis)
+    
+    @staticmethod
+    def calculate_basis(cp_shape: tuple, number_u: int, number_v: int, _):
+        return bezier.basis_matrix(number_u, cp_shape[1] - 1), bezier.basis_matrix(number_v, cp_shape[2] - 1)
     
     def get_order(self) -> Tuple[int, int]:
         return (self.cp.shape[1] - 1, self.cp.shape[2] - 1)
@@ -389,14 +434,14 @@ class Hermite(Geometry):
 class HermiteCurve(Hermite, Curve):
     @staticmethod
     def calculate_tangents(cp: np.ndarray) -> np.ndarray:
-        """Return a copy of the array with the tangent vectors calculated."""
-        # Create a copy of the array to prevent modifying the original array.
-        cp = cp.copy()
-        cp[:, 2:4] = (cp[:, 2:4] - cp[:, 0:2]) * Hermite.hermite_tangent_scaling
-        return cp
+        """Return a new array with the tangent vectors calculated, without modifying the original array."""
+        return np.concatenate((
+            cp[:, 0:2],
+            (cp[:, 2:4] - cp[:, 0:2]) * Hermite.hermite_tangent_scaling,
+        ), axis=1)
     
     @staticmethod
-    def calculate(cp: np.ndarray, number_u: int, number_v: int, _):
+    def calculate(cp: np.ndarray, number_u: int, number_v: int, _, basis: tuple = (None, None)):
         return hermite.HermiteCurve(
             HermiteCurve.calculate_tangents(cp),
             number_u,
@@ -413,38 +458,28 @@ class HermiteCurve(Hermite, Curve):
     def get_order(self):
         return 3
     
-    def reset_data(self) -> None:
-        """Extend the base class method to add lines for the tangent vectors."""
-        super().reset_data()
-
-        # Add lines.
+    def make_lines_cp(self) -> vtk.vtkCellArray:
+        """Override the base class method to add lines for the tangent vectors."""
         lines = vtk.vtkCellArray()
         lines.InsertNextCell(2, [0, 2])
         lines.InsertNextCell(2, [1, 3])
-        self.data_cp.SetLines(lines)
-
-        # Set line colors.
-        colors = self.data_cp.GetCellData().GetScalars()
-        for i in range(lines.GetNumberOfCells()):
-            tuple_id = i + len(self.ids_cp)
-            colors.InsertTuple(tuple_id, Geometry.color_lines_cp)
-        self.data_cp.Modified()
+        return lines
 
 class HermiteSurface(Hermite, Surface):
     @staticmethod
     def calculate_tangents(cp: np.ndarray):
-        """Return a copy of the array with the tangent vectors and twist vectors calculated."""
-        # Create a copy of the array to prevent modifying the original array.
-        cp = cp.copy()
-        # Calculate the tangent vectors.
-        cp[:, 0:2, 2:4] = (cp[:, 0:2, 2:4] - cp[:, 0:2, 0:2]) * Hermite.hermite_tangent_scaling
-        cp[:, 2:4, 0:2] = (cp[:, 2:4, 0:2] - cp[:, 0:2, 0:2]) * Hermite.hermite_tangent_scaling
-        # Calculate the twist vectors.
-        cp[:, 2:4, 2:4] = (cp[:, 2:4, 2:4] - cp[:, 0:2, 0:2]) * Hermite.hermite_tangent_scaling
-        return cp
+        """Return a new array with the tangent vectors and twist vectors calculated, without modifying the original array."""
+        corners = cp[:, 0:2, 0:2]
+        scaling = Hermite.hermite_tangent_scaling
+        return np.block([
+            # Corner points and tangent vectors along v.
+            [corners, (cp[:, 0:2, 2:4] - corners) * scaling],
+            # Tangent vectors along u and twist vectors.
+            [(cp[:, 2:4, 0:2] - corners) * scaling, (cp[:, 2:4, 2:4] - corners) * scaling],
+        ])
     
     @staticmethod
-    def calculate(cp: np.ndarray, number_u: int, number_v: int, _):
+    def calculate(cp: np.ndarray, number_u: int, number_v: int, _, basis: tuple = (None, None)):
         return hermite.HermiteSurface(
             HermiteSurface.calculate_tangents(cp),
             number_u,
@@ -462,24 +497,14 @@ class HermiteSurface(Hermite, Surface):
     def get_order(self):
         return (3, 3)
     
-    def reset_data(self) -> None:
-        """Extend the base class method to add lines for the tangent and twist vectors."""
-        super().reset_data()
-
-        # Add lines.
+    def make_lines_cp(self) -> vtk.vtkCellArray:
+        """Override the base class method to add lines for the tangent and twist vectors."""
         lines = vtk.vtkCellArray()
         for i in (0, 1, 4, 5):
             lines.InsertNextCell(2, [i, i+2])  # Tangent vector
             lines.InsertNextCell(2, [i, i+8])  # Tangent vector
             lines.InsertNextCell(2, [i, i+10])  # Twist vector
-        self.data_cp.SetLines(lines)
-
-        # Set line colors.
-        colors = self.data_cp.GetCellData().GetScalars()
-        for i in range(lines.GetNumberOfCells()):
-            tuple_id = i + len(self.ids_cp)
-            colors.InsertTuple(tuple_id, Geometry.color_lines_cp)
-        self.data_cp.Modified()
+        return lines
 
 class BSpline(Geometry):
     geometry_name = Geometry.BSPLINE
@@ -489,8 +514,12 @@ class BSpline(Geometry):
 
 class BSplineCurve(BSpline, Curve):
     @staticmethod
-    def calculate(cp: np.ndarray, number_u: int, _, order: int) -> np.ndarray:
-        return bspline.curve(cp, number_u, order)
+    def calculate(cp: np.ndarray, number_u: int, _, order: int, basis: tuple = (None, None)) -> np.ndarray:
+        return bspline.curve(cp, number_u, order, basis[0])
+    
+    @staticmethod
+    def calculate_basis(cp_shape: tuple, number_u: int, _, order: int):
+        return bspline.basis_matrix(number_u, cp_shape[1] - 1, order), None
     
     def max_order(self, number_cp_u: int = None) -> int:
         """Return the highest order that this geometry can have, based on the given number of control points."""
@@ -501,30 +530,24 @@ class BSplineCurve(BSpline, Curve):
         continuity = bspline.continuity_of_curves(cp_1, cp_2)
         return Continuity(*continuity) if continuity is not None else Continuity()
     
-    def reset_data(self) -> None:
-        """Extend the base class method to add lines between control points."""
-        super().reset_data()
-
-        # Add lines.
+    def make_lines_cp(self) -> vtk.vtkCellArray:
+        """Override the base class method to add lines between control points."""
         lines = vtk.vtkCellArray()
         for i, point_id in enumerate(self.ids_cp):
             if i == 0:
                 continue
             else:
                 lines.InsertNextCell(2, [self.ids_cp[i-1], point_id])
-        self.data_cp.SetLines(lines)
-        
-        # Set line colors.
-        colors = self.data_cp.GetCellData().GetScalars()
-        for i in range(lines.GetNumberOfCells()):
-            tuple_id = i + len(self.ids_cp)
-            colors.InsertTuple(tuple_id, Geometry.color_lines_cp)
-        self.data_cp.Modified()
+        return lines
 
 class BSplineSurface(BSpline, Surface):
     @staticmethod
-    def calculate(cp: np.ndarray, number_u: int, number_v: int, order: int):
-        return bspline.surface(cp, number_u, number_v, order)
+    def calculate(cp: np.ndarray, number_u: int, number_v: int, order: int, basis: tuple = (None, None)):
+        return bspline.surface(cp, number_u, number_v, order, *basis)
+    
+    @staticmethod
+    def calculate_basis(cp_shape: tuple, number_u: int, number_v: int, order: int):
+        return bspline.basis_matrix(number_u, cp_shape[1] - 1, order), bspline.basis_matrix(number_v, cp_shape[2] - 1, order)
     
     def max_order(self, number_cp_u: int = None, number_cp_v: int = None) -> int:
         """Return the highest order that this geometry can have, based on the given numbers of control points."""
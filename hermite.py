@@ -2,48 +2,75 @@
 Functions that calculate Hermite curves and surfaces.
 """
 
+from functools import lru_cache
+
 import numpy as np
 
 
+# Matrix used to calculate the second derivatives of Hermite curves, and the results of multiplying it by [0, 0, 0, 1] and by [1, 1, 1, 1], which give the second derivatives at u = 0 and at u = 1.
+M_CONTINUITY = np.array([[0, 0, 0, 0], [0, 0, 0, 0], [12, -12, 6, 6], [-6, 6, -4, -2]])
+M_CONTINUITY_U0 = M_CONTINUITY[3].copy()
+M_CONTINUITY_U1 = M_CONTINUITY.sum(axis=0)
+
+# Indices to the rows and columns of a Hermite surface's control points array that give the two corner points and two tangent vectors along each of its four sides.
+SIDE_ROWS = np.array([[0, 0, 2, 2], [0, 1, 0, 1], [1, 1, 3, 3], [0, 1, 0, 1]])
+SIDE_COLUMNS = np.array([[0, 1, 0, 1], [0, 0, 2, 2], [0, 1, 0, 1], [1, 1, 3, 3]])
+
+# Maximum difference between two values for them to be considered equal when calculating continuity.
+TOLERANCE = 1e-9
+
+
+def is_close(a: np.ndarray, b: np.ndarray) -> bool:
+    """Return True if all values in the two arrays differ by less than the tolerance."""
+    return np.abs(a - b).max() < TOLERANCE
+
+
+@lru_cache(maxsize=128)
+def basis_matrix(num: int) -> np.ndarray:
+    """Return the Hermite basis functions for the two points and two tangent vectors evaluated at `num` evenly spaced parameters, with shape (num, 4). Results are cached because they depend only on `num`."""
+    t = np.linspace(0, 1, num)
+    # Evaluate each cubic polynomial using Horner's rule.
+    basis = np.stack((
+        ((2*t - 3) * t) * t + 1,
+        ((-2*t + 3) * t) * t,
+        ((t - 2) * t + 1) * t,
+        ((t - 1) * t) * t,
+    ), axis=1)
+    # Prevent the cached array from being modified.
+    basis.flags.writeable = False
+    return basis
+
+
 # Function to visualize a Hermite Curve
 def HermiteCurve(p, num):
-    points = np.linspace(0, 1, num)
-    m = [[2, -2, 1, 1], [-3, 3, -2, -1], [0, 0, 1, 0], [1, 0, 0, 0]]
-    curve = np.array((points**3, points**2, points, points**0)).transpose() @ m @ p
+    curve = basis_matrix(num) @ p
     return curve
 
 
 # Function to visualize a Hermite Surface
 def HermiteSurface(p, num_u, num_v):
-    points_u = np.linspace(0, 1, num_u)
-    points_v = np.linspace(0, 1, num_v)
-    
-    m = np.array([[2, -2, 1, 1], [-3, 3, -2, -1], [0, 0, 1, 0], [1, 0, 0, 0]])
-    surface = (
-        np.array((points_u**3, points_u**2, points_u, points_u**0)).transpose()
-        @ m @ p @ m.transpose()
-        @ np.array((points_v**3, points_v**2, points_v, points_v**0))
-    )
+    surface = basis_matrix(num_u) @ p @ basis_matrix(num_v).transpose()
     return surface
 
 
 # Function to calculate continuity between Hermite Curves
 def HermiteCurveContinuity(p1, p2):
     """Return the continuity of two Hermite curves as a tuple (str, int), or return None if no continuity exists."""
-    M = np.array([[0, 0, 0, 0], [0, 0, 0, 0], [12, -12, 6, 6], [-6, 6, -4, -2]])
-    p1u0 = np.dot(np.dot(np.array([0, 0, 0, 1]), M), p1[:, :, 0].transpose())
-    p1u1 = np.dot(np.dot(np.array([1, 1, 1, 1]), M), p1[:, :, 0].transpose())
-    p2u0 = np.dot(np.dot(np.array([0, 0, 0, 1]), M), p2[:, :, 0].transpose())
-    p2u1 = np.dot(np.dot(np.array([1, 1, 1, 1]), M), p2[:, :, 0].transpose())
-
-    if (p1[:, 1, :] == p2[:, 0, :]).all() or (p2[:, 1, :] == p1[:, 0, :]).all():
-        if (p1[:, 3, :] == p2[:, 2, :]).all() or (p2[:, 3, :] == p1[:, 2, :]).all():
-            if (p1u1 == p2u0).all() or (p1u0 == p2u1).all():
+    p1u0 = M_CONTINUITY_U0 @ p1[:, :, 0].transpose()
+    p1u1 = M_CONTINUITY_U1 @ p1[:, :, 0].transpose()
+    p2u0 = M_CONTINUITY_U0 @ p2[:, :, 0].transpose()
+    p2u1 = M_CONTINUITY_U1 @ p2[:, :, 0].transpose()
+
+    if is_close(p1[:, 1, :], p2[:, 0, :]) or is_close(p2[:, 1, :], p1[:, 0, :]):
+        if is_close(p1[:, 3, :], p2[:, 2, :]) or is_close(p2[:, 3, :], p1[:, 2, :]):
+            if is_close(p1u1, p2u0) or is_close(p1u0, p2u1):
                 return ('C', 2)
             return ('C', 1)
         if 0 in p1[:, 2, :] or 0 in p1[:, 3, :]:
             return ('CG', 0)
-        if (p1[:, 3, :] / p2[:, 2, :] == (p1[:, 3, :] / p2[:, 2, :])[0]).all() or (p2[:, 3, :] / p1[:, 2, :] == (p2[:, 3, :] / p1[:, 2, :])[0]).all():
+        ratio_1 = p1[:, 3, :] / p2[:, 2, :]
+        ratio_2 = p2[:, 3, :] / p1[:, 2, :]
+        if is_close(ratio_1, ratio_1[0]) or is_close(ratio_2, ratio_2[0]):
             return ('G', 1)
         return ('CG', 0)
     return None
@@ -52,37 +79,28 @@ def HermiteCurveContinuity(p1, p2):
 # Function to calculate continuity between Hermite Curves
 def HermiteSurfaceContinuity(p1, p2):
     """Return the continuity of two Hermite surfaces as a tuple (str, int), or return None if no continuity exists."""
-    p1sides = np.zeros((4, len(p1), len(p1[0])))
-    for i in range(len(p1)):
-        p1sides[0][i] = np.array([p1[i][0][0], p1[i][0][1], p1[i][2][0], p1[i][2][1]])
-        p1sides[1][i] = np.array([p1[i][0][0], p1[i][1][0], p1[i][0][2], p1[i][1][2]])
-        p1sides[2][i] = np.array([p1[i][1][0], p1[i][1][1], p1[i][3][0], p1[i][3][1]])
-        p1sides[3][i] = np.array([p1[i][0][1], p1[i][1][1], p1[i][0][3], p1[i][1][3]])
-
-    p2sides = np.zeros((4, len(p2), len(p2[0])))
-    for i in range(len(p1)):
-        p2sides[0][i] = np.array([p2[i][0][0], p2[i][0][1], p2[i][2][0], p2[i][2][1]])
-        p2sides[1][i] = np.array([p2[i][0][0], p2[i][1][0], p2[i][0][2], p2[i][1][2]])
-        p2sides[2][i] = np.array([p2[i][1][0], p2[i][1][1], p2[i][3][0], p2[i][3][1]])
-        p2sides[3][i] = np.array([p2[i][0][1], p2[i][1][1], p2[i][0][3], p2[i][1][3]])
-
-    for i in range(len(p1sides)):
-        for j in range(len(p2sides)):
-            if (p1sides[i].T[0] == p2sides[j].T[0]).all() and (p1sides[i].T[1] == p2sides[j].T[1]).all():
-                p1 = p1sides[i]
-                p2 = p2sides[j]
-                if (p1sides[i].T[2] == p2sides[j].T[2]).all() and (p1sides[i].T[3] == p2sides[j].T[3]).all():
-                    M = np.array([[0, 0, 0, 0], [0, 0, 0, 0], [12, -12, 6, 6], [-6, 6, -4, -2]])
-                    p1u0 = np.dot(np.dot(np.array([0, 0, 0, 1]), M), p1.transpose())
-                    p1u1 = np.dot(np.dot(np.array([1, 1, 1, 1]), M), p1.transpose())
-                    p2u0 = np.dot(np.dot(np.array([0, 0, 0, 1]), M), p2.transpose())
-                    p2u1 = np.dot(np.dot(np.array([1, 1, 1, 1]), M), p2.transpose())
-                    if (p1u1 == p2u0).all() or (p1u0 == p2u1).all():
-                        return ('C', 2)
-                    return ('C', 1)
-                if (p1[:, 3, :] / p2[:, 2, :] == (p1[:, 3, :] / p2[:, 2, :])[0]).all() or (p2[:, 3, :] / p1[:, 2, :] == (p2[:, 3, :] / p1[:, 2, :])[0]).all():
-                    return ('G', 1)
-                return ('CG', 0)
+    # Arrays of the corner points and tangent vectors along each of the four sides, with shape (4, 3, 4).
+    p1sides = p1[:, SIDE_ROWS, SIDE_COLUMNS].transpose((1, 0, 2))
+    p2sides = p2[:, SIDE_ROWS, SIDE_COLUMNS].transpose((1, 0, 2))
+
+    # Compare the corner points of every pair of sides at once, giving an array with shape (4, 4) that is True for pairs of sides that are shared.
+    is_shared = np.abs(p1sides[:, None, :, :2] - p2sides[None, :, :, :2]).max(axis=(2, 3)) < TOLERANCE
+    for i, j in zip(*np.nonzero(is_shared)):
+        p1 = p1sides[i]
+        p2 = p2sides[j]
+        if is_close(p1[:, 2:], p2[:, 2:]):
+            p1u0 = M_CONTINUITY_U0 @ p1.transpose()
+            p1u1 = M_CONTINUITY_U1 @ p1.transpose()
+            p2u0 = M_CONTINUITY_U0 @ p2.transpose()
+            p2u1 = M_CONTINUITY_U1 @ p2.transpose()
+            if is_close(p1u1, p2u0) or is_close(p1u0, p2u1):
+                return ('C', 2)
+            return ('C', 1)
+        ratio_1 = p1[:, 3] / p2[:, 2]
+        ratio_2 = p2[:, 3] / p1[:, 2]
+        if is_close(ratio_1, ratio_1[0]) or is_close(ratio_2, ratio_2[0]):
+            return ('G', 1)
+        return ('CG', 0)
     return None
 
 
@@ -2,12 +2,14 @@
 Mouse-click interactions with geometry.
 """
 
+import time
 from typing import List, Tuple
 
+from PyQt5.QtCore import QTimer
 import vtk
 
 from colors import *
-from geometry import Geometry, Curve
+from geometry import Geometry
 
 
 class InteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
@@ -15,6 +17,9 @@ class InteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
 
     def __init__(self, gui):
         self.gui = gui
+        # The interactor and renderer that this object is used with, stored to avoid looking them up through VTK on every mouse event.
+        self.interactor = gui.iren
+        self.renderer = gui.ren
 
         # Create the picker objects used to select a geometry on the screen. A vtkPointPicker selects a single point on control points actors, and a vtkCellPicker selects nodes actors.
         self.point_picker = vtk.vtkPointPicker()
@@ -34,10 +39,22 @@ class InteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
         # The currently selected actors.
         self.selected_point_id = None
         self.selected_cp_actor = None
-        self.selected_nodes_actor = []
+        # The selected nodes actors are keyed by their IDs for fast membership tests, and dictionaries preserve the order in which they were selected.
+        self.selected_nodes_actor = {}
+
+        # The results of the last picking.
+        self.picked_point_id = -1
+        self.picked_actor_cp = None
+        self.picked_actor_nodes = None
+
+        # The value that mouse positions are multiplied by, stored to avoid reading the settings field on every mouse event. Updated when the settings field is edited.
+        self.mouse_modifier = 1.0
 
         # The previous position, in world coordinates, where the last mouse click or mouse move occured.
         self.previous_position = None
+        # The object used to convert mouse positions from display coordinates to world coordinates, reused for every mouse event.
+        self.coordinate = vtk.vtkCoordinate()
+        self.coordinate.SetCoordinateSystemToDisplay()
 
         # Set functions to be called when mouse events occur.
         self.AddObserver("LeftButtonPressEvent", self.left_mouse_press)
@@ -48,32 +65,52 @@ class InteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
         self.is_dragging = False
         # The point ID currently being dragged.
         self.dragged_point_id = None
+        # Whether any actors have been added to the pick lists.
+        self.has_pickables = False
+
+        # The minimum time, in seconds, between two mouse move events that are processed. Mouse move events that occur faster than this are skipped to avoid picking and rendering more often than the screen refreshes.
+        self.mouse_move_interval = 0.016
+        # The time at which the last mouse move event was processed.
+        self.time_last_mouse_move = 0.0
+        # Whether the last mouse move event was skipped, used to apply the final position of a drag when the mouse is released.
+        self.is_mouse_move_skipped = False
+        # Whether a skipped mouse move event is already scheduled to be processed after the interval.
+        self.is_mouse_move_scheduled = False
+        # Incremented on each mouse press, so that a timer scheduled before the press can be recognized and ignored when it fires.
+        self.mouse_press_count = 0
     
     def add_to_pick_list(self, geometry):
         """Add the actors in the Geometry object to their corresponding pickers."""
         actor_cp, actor_nodes = geometry.get_actors()
         self.point_picker.AddPickList(actor_cp)
         self.nodes_picker.AddPickList(actor_nodes)
+        self.has_pickables = True
     
     def remove_from_pick_list(self, geometry):
         """Remove the actors in the Geometry object from their corresponding pickers."""
         actor_cp, actor_nodes = geometry.get_actors()
         self.point_picker.DeletePickList(actor_cp)
         self.nodes_picker.DeletePickList(actor_nodes)
+        self.has_pickables = self.point_picker.GetPickList().GetNumberOfItems() + self.nodes_picker.GetPickList().GetNumberOfItems() > 0
 
     def left_mouse_press(self, obj, event):
         """Pick the geometry at the cursor, or deselect previous selections if nothing was picked."""
         self.pick()
         self.previous_position = self.get_mouse_position_world()
+        self.time_last_mouse_move = time.perf_counter()
+        # Discard any skipped hover event, which is replaced by the pick above, so that only mouse moves made after the press are applied as drags. A timer already scheduled for the hover event is ignored when it fires because it was scheduled before this press, and mouse moves after this press schedule their own timer.
+        self.is_mouse_move_skipped = False
+        self.is_mouse_move_scheduled = False
+        self.mouse_press_count += 1
         
-        is_multiselection = self.GetInteractor().GetShiftKey() or self.GetInteractor().GetControlKey()
+        is_multiselection = self.interactor.GetShiftKey() or self.interactor.GetControlKey()
         self.unhighlight_selection_point()
         if not is_multiselection:
             self.unhighlight_selection_nodes()
 
-        point_id = self.point_picker.GetPointId()
-        actor_cp = self.point_picker.GetActor()
-        actor_nodes = self.nodes_picker.GetActor()
+        point_id = self.picked_point_id
+        actor_cp = self.picked_actor_cp
+        actor_nodes = self.picked_actor_nodes
         # No actor was selected.
         if actor_cp is None and actor_nodes is None:
             self.is_dragging = False
@@ -85,7 +122,7 @@ class InteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
             
             # A control point was selected.
             if point_id >= 0:
-                geometry = self.gui.get_geometry_of_actor(actor_cp)
+                geometry = actor_cp.geometry
                 self.gui.set_selected_point(point_id)
                 self.gui.set_selected_geometry(
                     geometry,
@@ -98,7 +135,7 @@ class InteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
                 self.highlight_point(actor_cp, point_id)
             # A nodes actor was selected.
             elif actor_nodes is not None:
-                geometry = self.gui.get_geometry_of_actor(actor_nodes)
+                geometry = actor_nodes.geometry
                 self.gui.set_selected_point(None)
                 self.gui.set_selected_geometry(
                     geometry,
@@ -108,14 +145,19 @@ class InteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
                 self.set_selected_nodes(actor_nodes, append=is_multiselection)
                 self.highlight_actor(actor_nodes)
 
-        self.GetInteractor().Render()
+        # Render once after pending events are processed, together with any other scheduled updates.
+        self.gui.schedule_flush()
 
         # Run the default superclass function after custom behavior defined above.
         self.OnLeftButtonDown()
 
     def left_mouse_release(self, obj, event):
         """Stop dragging."""
-        self.pick()
+        # Apply the final position of the drag if the last mouse move event after the press was skipped.
+        if self.is_dragging and self.is_mouse_move_skipped:
+            self.drag()
+        self.is_mouse_move_skipped = False
+
         self.previous_position = None
         self.is_dragging = False
         self.dragged_point_id = None
@@ -125,115 +167,177 @@ class InteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
 
     def mouse_move(self, obj, event):
         """Highlight the actors at the cursor, or drag the previously selected actor if the mouse is pressed."""
-        self.pick()
+        # Skip picking if there is nothing to pick or if the camera is being rotated, panned, or zoomed.
+        if not self.is_dragging and (not self.has_pickables or self.GetState() != vtk.VTKIS_NONE):
+            self.OnMouseMove()
+            return
 
-        actor = self.point_picker.GetActor()
-        point_id = self.point_picker.GetPointId()
-        self.highlight_point(actor, point_id)
-        
-        actor = self.nodes_picker.GetActor()
-        self.highlight_actor(actor)
+        # Skip this event if the previous one occurred too recently.
+        current_time = time.perf_counter()
+        if current_time - self.time_last_mouse_move < self.mouse_move_interval:
+            self.is_mouse_move_skipped = True
+            # Schedule the latest skipped event to be processed once the interval has passed, so that the highlighting is correct where the mouse stops.
+            if not self.is_mouse_move_scheduled:
+                self.is_mouse_move_scheduled = True
+                press_count = self.mouse_press_count
+                QTimer.singleShot(
+                    max(0, round((self.time_last_mouse_move + self.mouse_move_interval - current_time) * 1000)),
+                    lambda: self.process_skipped_mouse_move(press_count),
+                )
+            if not self.is_dragging:
+                self.OnMouseMove()
+            return
+        self.time_last_mouse_move = current_time
+        self.is_mouse_move_skipped = False
 
-        self.GetInteractor().Render()
+        self.process_mouse_move()
         
         # Run the default superclass function after custom behavior defined above.
         if not self.is_dragging:
             self.OnMouseMove()
+    
+    def process_skipped_mouse_move(self, press_count: int) -> None:
+        """Process the last mouse move event if it was skipped. Called automatically after the interval following a skipped event, with the number of mouse presses that had occurred when it was scheduled."""
+        # Ignore a timer scheduled before the last mouse press, which does not own the currently scheduled timer.
+        if press_count != self.mouse_press_count:
+            return
+        self.is_mouse_move_scheduled = False
+        # Process the event only if it is a drag skipped after the press, or a hover while the camera is not being rotated, panned, or zoomed.
+        if self.is_mouse_move_skipped and (self.is_dragging or self.GetState() == vtk.VTKIS_NONE):
+            self.time_last_mouse_move = time.perf_counter()
+            self.is_mouse_move_skipped = False
+            self.process_mouse_move()
+    
+    def process_mouse_move(self) -> None:
+        """Pick and highlight the actors at the position of the last mouse event, or drag the selected actor if dragging."""
+        # Picking and highlighting are not needed while dragging, because the dragged actor is already selected and highlighted.
+        if self.is_dragging:
+            self.drag()
+            return
+
+        self.pick()
+
+        # Update the highlighting, and only render if the highlighting changed.
+        actor = self.picked_actor_cp
+        point_id = self.picked_point_id
+        is_changed = self.highlight_point(actor, point_id)
+        
+        actor = self.picked_actor_nodes
+        if actor is not self.previous_nodes_actor:
+            self.highlight_actor(actor)
+            is_changed = True
+
+        if is_changed:
+            self.gui.schedule_flush()
+    
+    def drag(self) -> None:
+        """Move the dragged control point, or the selected geometries if dragging a nodes actor, to the position of the last mouse event."""
+        # If dragging a control point, update its position.
+        if self.dragged_point_id is not None:
+            position = self.get_mouse_position_world()
+            self.gui.set_cp(position, self.dragged_point_id)
+            self.gui.set_selected_point(self.dragged_point_id)
+            self.gui.set_selected_geometry(
+                self.selected_cp_actor.geometry
+            )
+            self.gui.load_fields()
+        # If dragging a nodes, update the position of the entire geometry.
         else:
-            # If dragging a control point, update its position.
-            if self.dragged_point_id is not None:
-                position = self.get_mouse_position_world()
-                self.gui.set_cp(position, self.dragged_point_id)
-                self.gui.set_selected_point(self.dragged_point_id)
-                self.gui.set_selected_geometry(
-                    self.gui.get_geometry_of_actor(self.selected_cp_actor)
+            if self.previous_position:
+                current_position = self.get_mouse_position_world()
+                previous_position = self.previous_position
+                translation = (
+                    current_position[0] - previous_position[0],
+                    current_position[1] - previous_position[1],
+                    current_position[2] - previous_position[2],
                 )
-                self.gui.load_fields()
-            # If dragging a nodes, update the position of the entire geometry.
-            else:
-                if self.previous_position:
-                    current_position = self.get_mouse_position_world()
-                    translation = [current - previous for current, previous in zip(current_position, self.previous_position)]
-                    self.gui.translate_geometries(translation)
-                    self.previous_position = current_position
+                self.gui.translate_geometries(translation)
+                self.previous_position = current_position
     
     def get_mouse_position(self) -> Tuple[float, float]:
         """Return the position of the last mouse event in pixels (x, y)."""
-        position = self.GetInteractor().GetEventPosition()
-        return tuple(round(_ * self.gui.settings_field_mouse_modifier.value()) for _ in position)
+        x, y = self.interactor.GetEventPosition()
+        modifier = self.mouse_modifier
+        # Skip the multiplication for the default modifier, which is used on most devices.
+        if modifier == 1:
+            return x, y
+        return round(x * modifier), round(y * modifier)
+    
+    def set_mouse_modifier(self, modifier: float) -> None:
+        """Set the value that mouse positions are multiplied by."""
+        self.mouse_modifier = modifier
     
     def get_mouse_position_world(self) -> Tuple[float, float, float]:
         """Return the position of the last mouse event in world coordinates (x, y, z)."""
-        position = self.get_mouse_position()
-        coordinate = vtk.vtkCoordinate()
-        coordinate.SetCoordinateSystemToDisplay()
-        coordinate.SetValue(position[0], position[1], self.gui.settings_field_mouse_z_depth.value())
-        return coordinate.GetComputedWorldValue(self.GetDefaultRenderer())
+        x, y = self.get_mouse_position()
+        self.coordinate.SetValue(x, y, self.gui.settings_field_mouse_z_depth.value())
+        return self.coordinate.GetComputedWorldValue(self.renderer)
     
     def pick(self) -> None:
-        """Perform picking where a mouse event last occurred."""
+        """Perform picking where a mouse event last occurred and store the picked actors and point ID."""
         # Get the mouse location in display coordinates.
-        position = self.get_mouse_position()
+        x, y = self.get_mouse_position()
         # Perform picking.
-        self.point_picker.Pick(
-            position[0], position[1], 0, self.GetDefaultRenderer()
-        )
-        self.nodes_picker.Pick(
-            position[0], position[1], 0, self.GetDefaultRenderer()
-        )
+        self.point_picker.Pick(x, y, 0, self.renderer)
+        self.picked_point_id = self.point_picker.GetPointId()
+        self.picked_actor_cp = self.point_picker.GetActor()
+        self.nodes_picker.Pick(x, y, 0, self.renderer)
+        self.picked_actor_nodes = self.nodes_picker.GetActor()
 
     def highlight_actor(self, actor: vtk.vtkProp) -> None:
         """Highlight the given nodes actor."""
         # Restore the original appearance of the previous actor.
-        if self.previous_nodes_actor is not None and self.previous_nodes_actor not in self.selected_nodes_actor:
-            is_curve = isinstance(self.gui.get_geometry_of_actor(self.previous_nodes_actor), Curve)
-            self.previous_nodes_actor.GetProperty().DeepCopy(
-                Geometry.property_default_curve if is_curve else Geometry.property_default_surface
-            )
+        if self.previous_nodes_actor is not None and id(self.previous_nodes_actor) not in self.selected_nodes_actor:
+            self.set_appearance_nodes(self.previous_nodes_actor, False)
 
         # Highlight the actor.
         if actor:
-            is_curve = isinstance(self.gui.get_geometry_of_actor(actor), Curve)
-            actor.GetProperty().DeepCopy(
-                Geometry.property_highlight_curve if is_curve else Geometry.property_highlight_surface
-            )
+            self.set_appearance_nodes(actor, True)
         
         # Store the current actor, even if it is None.
         self.previous_nodes_actor = actor
     
-    def highlight_point(self, actor: vtk.vtkProp, point_id: int) -> None:
-        """Highlight only the specific point on the given control points actor."""
+    def set_appearance_nodes(self, actor: vtk.vtkProp, is_highlighted: bool) -> None:
+        """Set the property of the given nodes actor to the highlighted or default property shared by geometries of its type."""
+        geometry = actor.geometry
+        actor.SetProperty(geometry.property_highlight_nodes if is_highlighted else geometry.property_default_nodes)
+    
+    def highlight_point(self, actor: vtk.vtkProp, point_id: int) -> bool:
+        """Highlight only the specific point on the given control points actor, and return whether any colors changed."""
+        is_changed = False
         # Restore the original color of the previous point.
         if self.previous_cp_actor is not None and self.previous_point_id is not None and self.previous_point_id is not self.selected_point_id:
-            self.previous_cp_actor.GetMapper().GetInput().GetCellData().GetScalars().SetTuple(self.previous_point_id, Geometry.color_default_cp)
-            self.previous_cp_actor.GetMapper().GetInput().Modified()
+            is_changed |= self.set_color_point(self.previous_cp_actor, self.previous_point_id, Geometry.color_default_cp)
         
         # Highlight the point.
         if actor:
-            data = actor.GetMapper().GetInput()
-            colors = data.GetCellData().GetScalars()
-            if colors:
-                colors.SetTuple(point_id, Geometry.color_highlight_cp)
-                data.GetCellData().SetScalars(colors)
-                data.Modified()
+            is_changed |= self.set_color_point(actor, point_id, Geometry.color_highlight_cp)
 
         # Save the current point and corresponding actor. If no point was selected (-1), save None.
         self.previous_cp_actor = actor
         self.previous_point_id = point_id if point_id >= 0 else None
+
+        return is_changed
     
     def unhighlight_selection_point(self) -> None:
         """Remove highlighting from currently selected control point."""
         if self.selected_cp_actor:
-            self.selected_cp_actor.GetMapper().GetInput().GetCellData().GetScalars().SetTuple(self.selected_point_id, Geometry.color_default_cp)
-            self.selected_cp_actor.GetMapper().GetInput().Modified()
+            self.set_color_point(self.selected_cp_actor, self.selected_point_id, Geometry.color_default_cp)
+    
+    def set_color_point(self, actor: vtk.vtkProp, point_id: int, color) -> bool:
+        """Set the color of a single point on the given control points actor, and return whether the color changed."""
+        return actor.geometry.set_color_cp(point_id, color)
     
     def unhighlight_selection_nodes(self) -> None:
         """Remove highlighting from currently selected nodes actors."""
-        for actor in self.selected_nodes_actor:
-            is_curve = isinstance(self.gui.get_geometry_of_actor(actor), Curve)
-            actor.GetProperty().DeepCopy(
-                Geometry.property_default_curve if is_curve else Geometry.property_default_surface
-            )
+        if not self.selected_nodes_actor:
+            return
+        
+        for actor in self.selected_nodes_actor.values():
+            self.set_appearance_nodes(actor, False)
+        # Forget the previous actor if it was unhighlighted, so that it is highlighted again on the next mouse move.
+        if id(self.previous_nodes_actor) in self.selected_nodes_actor:
+            self.previous_nodes_actor = None
     
     def set_selected_point_id(self, point_id: int = None) -> None:
         """Set the given point ID as the current selection."""
@@ -246,11 +350,11 @@ class InteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
     def set_selected_nodes(self, actor_nodes: vtk.vtkProp = None, append: bool = False) -> None:
         """Set or append the nodes actor to the current selection."""
         if actor_nodes:
-            if actor_nodes not in self.selected_nodes_actor:
+            if id(actor_nodes) not in self.selected_nodes_actor:
                 if append:
-                    self.selected_nodes_actor.append(actor_nodes)
+                    self.selected_nodes_actor[id(actor_nodes)] = actor_nodes
                 else:
-                    self.selected_nodes_actor = [actor_nodes]
+                    self.selected_nodes_actor = {id(actor_nodes): actor_nodes}
         else:
             self.selected_nodes_actor.clear()
     
@@ -4,9 +4,10 @@ Run this script to start the GUI.
 
 import os
 import sys
+from typing import List
 
 import numpy as np
-from PyQt5.QtCore import Qt, QStringListModel, QItemSelectionModel
+from PyQt5.QtCore import Qt, QStringListModel, QItemSelectionModel, QTimer
 from PyQt5.QtGui import QIcon, QPixmap, QKeyEvent, QKeySequence
 from PyQt5.QtWidgets import QApplication, QMainWindow, QDialog, QFileDialog, QMenu, QWidget, QFrame, QPushButton, QCheckBox, QLabel, QSpinBox, QDoubleSpinBox, QGroupBox, QTabWidget, QListView, QAbstractItemView
 from PyQt5.QtWidgets import QVBoxLayout, QHBoxLayout, QFormLayout, QGridLayout
@@ -38,10 +39,14 @@ class MainWindow(QMainWindow):
 
         # All existing Geometry objects.
         self.geometries = []
+        # All existing Geometry objects keyed by their names shown in the list view.
+        self.geometry_by_name = {}
         # The currently selected Geometry objects.
         self.selected_geometry = []
         # The currently selected point ID.
         self.selected_point = None
+        # Whether geometries with deferred updates are already scheduled to be recalculated.
+        self.is_flush_scheduled = False
 
         # Create the menu bar and its menus.
         menu_bar = self.menuBar()
@@ -73,7 +78,8 @@ class MainWindow(QMainWindow):
 
         # Create dialog windows that can be hidden and shown.
         self.window_settings = self._make_window_settings()
-        self.window_about = self._make_window_about()
+        # The About window is created the first time it is shown.
+        self.window_about = None
 
         # Disable fields initially.
         self.load_fields()
@@ -119,6 +125,13 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(self.fields_number_cp)
         main_layout.addWidget(self.fields_number_nodes)
         main_layout.addWidget(self.fields_order)
+        # Fields whose values are loaded from the selected geometries, which should not emit signals while being loaded.
+        self.fields_loaded = (
+            self.field_x, self.field_y, self.field_z,
+            self.field_cp_u, self.field_cp_v,
+            self.field_nodes_u, self.field_nodes_v,
+            self.field_order,
+        )
 
         main_layout.addStretch(1)
 
@@ -273,6 +286,12 @@ class MainWindow(QMainWindow):
         style.SetDefaultRenderer(self.ren)
         self.iren.SetInteractorStyle(style)
 
+        # Create the pipeline used for saving images once and reuse it for every save.
+        self.image_filter = vtk.vtkWindowToImageFilter()
+        self.image_filter.SetInput(self.renwin)
+        self.image_writer = vtk.vtkPNGWriter()
+        self.image_writer.SetInputConnection(self.image_filter.GetOutputPort())
+
         return widget
     
     def _make_buttons_camera(self) -> QWidget:
@@ -345,6 +364,7 @@ class MainWindow(QMainWindow):
         self.settings_field_mouse_modifier.setValue(1.00)
         self.settings_field_mouse_modifier.setSingleStep(0.5)
         self.settings_field_mouse_modifier.setToolTip("Multiply mouse positions, in pixels, by this value to fix incorrect mouse positions on some devices.")
+        self.settings_field_mouse_modifier.valueChanged.connect(self.update_mouse_modifier)
         layout.addRow("Mouse Position Modifier:", self.settings_field_mouse_modifier)
 
         self.settings_field_mouse_z_depth = QDoubleSpinBox()
@@ -409,20 +429,19 @@ class MainWindow(QMainWindow):
         # The user specified a file name.
         if dialog.exec():
             filename = dialog.selectedFiles()[0]
+            # Make sure the saved image shows all updates made to geometries.
+            self.flush_geometries()
 
-            filter = vtk.vtkWindowToImageFilter()
-            filter.SetInput(self.renwin)
-            filter.SetScale(self.settings_field_save_scale.value())
+            self.image_filter.SetScale(self.settings_field_save_scale.value())
             if self.settings_checkbox_save_transparency.isChecked():
-                filter.SetInputBufferTypeToRGBA()
+                self.image_filter.SetInputBufferTypeToRGBA()
             else:
-                filter.SetInputBufferTypeToRGB()
-            filter.Update()
+                self.image_filter.SetInputBufferTypeToRGB()
+            # Always capture the window again, because camera and actor changes do not modify the filter.
+            self.image_filter.Modified()
 
-            writer = vtk.vtkPNGWriter()
-            writer.SetFileName(filename)
-            writer.SetInputConnection(filter.GetOutputPort())
-            writer.Write()
+            self.image_writer.SetFileName(filename)
+            self.image_writer.Write()
     
     def show_settings(self) -> None:
         """Show the Settings window."""
@@ -430,57 +449,69 @@ class MainWindow(QMainWindow):
         self.window_settings.setFixedSize(self.window_settings.size())
     
     def show_about(self) -> None:
-        """Show the About window."""
+        """Show the About window, creating it if it has not been shown before."""
+        if self.window_about is None:
+            self.window_about = self._make_window_about()
         self.window_about.show()
 
     def add_geometry(self, geometry: Geometry) -> None:
         """Add a new geometry."""
-        self.geometries.append(geometry)
-        
-        # Add the geometry's name to the list view.
+        self.add_geometries([geometry])
+
+    def add_geometries(self, geometries: List[Geometry]) -> None:
+        """Add multiple new geometries, inserting them into the list view at once and rendering only once."""
+        # Add the geometries' names to the list view.
         row_index = self.listview_model.rowCount()
-        self.listview_model.insertRow(row_index)
-        self.listview_model.setData(self.listview_model.index(row_index, 0), str(geometry))
-        
-        # Add the geometry's actors to the visualizer.
-        for actor in geometry.get_actors():
-            self.ren.AddActor(actor)
-        self.iren.GetInteractorStyle().add_to_pick_list(geometry)
+        self.listview_model.insertRows(row_index, len(geometries))
+
+        for geometry in geometries:
+            self.geometries.append(geometry)
+            self.geometry_by_name[geometry.name] = geometry
+            
+            self.listview_model.setData(self.listview_model.index(row_index, 0), geometry.name)
+            row_index += 1
+            
+            # Add the geometry's actors to the visualizer.
+            for actor in geometry.get_actors():
+                self.ren.AddActor(actor)
+            self.iren.GetInteractorStyle().add_to_pick_list(geometry)
 
         self.reset_camera()
 
     def remove_selected_geometries(self) -> None:
         """Remove all currently selected geometries."""
         if self.selected_geometry:
-            for geometry in self.selected_geometry:
-                # Remove the geometry's name from the list view.
-                row_index = self.listview_model.stringList().index(str(geometry))
+            removed_geometries = set(self.selected_geometry)
+            # Remove the geometries' names from the list view, whose rows are in the same order as the list of geometries. Rows are removed from last to first so that earlier row indices remain valid.
+            row_indices = [i for i, geometry in enumerate(self.geometries) if geometry in removed_geometries]
+            for row_index in reversed(row_indices):
                 self.listview_model.removeRow(row_index)
-                
+
+            for geometry in removed_geometries:
                 # Remove the geometry's actors from the visualizer.
                 self.iren.GetInteractorStyle().remove_from_pick_list(geometry)
                 for actor in geometry.get_actors():
                     self.ren.RemoveActor(actor)
                 
-                del self.geometries[self.geometries.index(geometry)]
+                del self.geometry_by_name[geometry.name]
+            
+            self.geometries = [geometry for geometry in self.geometries if geometry not in removed_geometries]
 
             self.selected_geometry.clear()
             self.selected_point = None
             self.load_fields()
             self.update_label_order()
-            self.ren.Render()
-            self.iren.Render()
+            self.schedule_flush()
 
     def make_bezier_curve(self) -> None:
         """Add a preset Bezier curve to the visualizer."""
         number_cp_u = self.settings_field_cp.value()
         number_u = self.settings_field_nodes.value()
 
-        cp = np.vstack((
-            np.linspace(0, 10, number_cp_u),  # x-coordinates
-            np.linspace(0, 10, number_cp_u),  # y-coordinates
-            np.zeros(number_cp_u),  # z-coordinates
-        )).reshape((3, number_cp_u, 1))
+        cp = np.empty((3, number_cp_u, 1))
+        cp[0, :, 0] = np.linspace(0, 10, number_cp_u)  # x-coordinates
+        cp[1, :, 0] = cp[0, :, 0]  # y-coordinates
+        cp[2, :, 0] = 0  # z-coordinates
 
         self.add_geometry(BezierCurve(cp, number_u))
 
@@ -499,11 +530,10 @@ class MainWindow(QMainWindow):
         order = 2
         number_cp_u = self.settings_field_cp.value()
         number_u = self.settings_field_nodes.value()
-        cp = np.vstack((
-            np.linspace(0, 10, number_cp_u),  # x-coordinates
-            np.linspace(0, 10, number_cp_u),  # y-coordinates
-            np.zeros(number_cp_u),  # z-coordinates
-        )).reshape((3, number_cp_u, 1))
+        cp = np.empty((3, number_cp_u, 1))
+        cp[0, :, 0] = np.linspace(0, 10, number_cp_u)  # x-coordinates
+        cp[1, :, 0] = cp[0, :, 0]  # y-coordinates
+        cp[2, :, 0] = 0  # z-coordinates
 
         self.add_geometry(BSplineCurve(cp, number_u, order=order))
     
@@ -512,9 +542,10 @@ class MainWindow(QMainWindow):
         number_cp_u = self.settings_field_cp.value()
         number_u = number_v = self.settings_field_nodes.value()
 
-        cp = np.dstack(
-            np.meshgrid(np.linspace(0, 10, number_cp_u), np.linspace(0, 10, number_cp_u)) + [np.zeros((number_cp_u,)*2)]
-        ).transpose((2, 0, 1))
+        cp = np.empty((3, number_cp_u, number_cp_u))
+        cp[0] = np.linspace(0, 10, number_cp_u)  # x-coordinates, increasing along v
+        cp[1] = cp[0].transpose()  # y-coordinates, increasing along u
+        cp[2] = 0  # z-coordinates
 
         self.add_geometry(BezierSurface(cp, number_u, number_v))
 
@@ -537,9 +568,10 @@ class MainWindow(QMainWindow):
         number_cp_u = number_cp_v = self.settings_field_cp.value()
         number_u = number_v = self.settings_field_nodes.value()
 
-        cp = np.dstack(
-            np.meshgrid(np.linspace(0, 10, number_cp_u), np.linspace(0, 10, number_cp_v)) + [np.zeros((number_cp_u, number_cp_v))]
-        ).transpose((2, 0, 1))
+        cp = np.empty((3, number_cp_v, number_cp_u))
+        cp[0] = np.linspace(0, 10, number_cp_u)  # x-coordinates, increasing along v
+        cp[1] = np.linspace(0, 10, number_cp_v)[:, None]  # y-coordinates, increasing along u
+        cp[2] = 0  # z-coordinates
 
         self.add_geometry(BSplineSurface(cp, number_u, number_v, order))
 
@@ -553,24 +585,23 @@ class MainWindow(QMainWindow):
         ])
         if len(self.selected_geometry) == 1:
             geometry = self.selected_geometry[0]
-            geometry.update_single_cp(point, self.selected_point)
-            self.ren.Render()
-            self.iren.Render()
+            geometry.update_single_cp(point, self.selected_point, defer=True)
+            self.schedule_flush()
     
     def set_cp(self, point: np.ndarray, point_id: int) -> None:
         """Set the coordinates of the given control point."""
         if len(self.selected_geometry) == 1:
             geometry = self.selected_geometry[0]
             geometry.update_single_cp(point, point_id)
-            self.ren.Render()
-            self.iren.Render()
+            self.schedule_flush()
     
     def translate_geometries(self, translation: tuple) -> None:
         """Translate the currently selected geometries."""
+        # Convert the translation to an array once instead of once per geometry.
+        translation = np.reshape(translation, (3, 1, 1))
         for geometry in self.selected_geometry:
             geometry.translate(translation)
-        self.ren.Render()
-        self.iren.Render()
+        self.schedule_flush()
 
     def update_number_cp(self, value) -> None:
         """Update the number of control points in the currently selected geometries. Called automatically when the fields are edited."""
@@ -582,7 +613,7 @@ class MainWindow(QMainWindow):
                     self.field_order.setValue(max_order)
             
             cp = geometry.resize_cp(self.field_cp_u.value(), self.field_cp_v.value())
-            geometry.update(cp)
+            geometry.update(cp, defer=True)
         
         # Deselect the currently selected point ID to prevent errors when decreasing the number of control points, which may result in the currently selected point ID being out of bounds.
         self.selected_point = None
@@ -591,8 +622,7 @@ class MainWindow(QMainWindow):
         self.iren.GetInteractorStyle().set_selected_cp(None)
 
         self.update_label_order()
-        self.ren.Render()
-        self.iren.Render()
+        self.schedule_flush()
     
     def update_number_nodes(self) -> None:
         """Update the number of nodes in the currently selected geometries. Called automatically when the fields are edited."""
@@ -600,9 +630,9 @@ class MainWindow(QMainWindow):
             geometry.update(
                 number_u=self.field_nodes_u.value(),
                 number_v=self.field_nodes_v.value(),
+                defer=True,
             )
-        self.ren.Render()
-        self.iren.Render()
+        self.schedule_flush()
 
     def update_order(self, value) -> None:
         """Update the order of the currently selected geometries. Called automatically when the fields are edited."""
@@ -615,11 +645,24 @@ class MainWindow(QMainWindow):
                     self.field_order.setValue(max_order)
                     self.field_order.blockSignals(False)
                     return
-                geometry.update(order=self.field_order.value())
+                geometry.update(order=self.field_order.value(), defer=True)
         self.update_label_order()
-        self.ren.Render()
-        self.iren.Render()
+        self.schedule_flush()
     
+    def schedule_flush(self) -> None:
+        """Recalculate geometries with deferred updates after pending events are processed. Consecutive edits made before then are recalculated and rendered only once."""
+        if not self.is_flush_scheduled:
+            self.is_flush_scheduled = True
+            QTimer.singleShot(0, self.flush_geometries)
+    
+    def flush_geometries(self) -> None:
+        """Recalculate all geometries with deferred updates and render."""
+        self.is_flush_scheduled = False
+        for geometry in self.geometries:
+            geometry.flush()
+        # Rendering through the interactor renders the whole window, including the renderer.
+        self.iren.Render()
+
     def update_label_order(self) -> None:
         """Update the label with the order of the currently selected geometry."""
         # Show the order if only one geometry is selected.
@@ -677,13 +720,12 @@ class MainWindow(QMainWindow):
         self.iren.GetInteractorStyle().unhighlight_selection_point()
         self.iren.GetInteractorStyle().unhighlight_selection_nodes()
         
-        names = [str(_) for _ in self.geometries]
         indices = self.listview.selectionModel().selectedIndexes()
         is_multiselection = len(indices) > 1
         if len(indices):
             for index in indices:
                 name = self.listview_model.data(index, Qt.DisplayRole)
-                geometry = self.geometries[names.index(name)]
+                geometry = self.geometry_by_name[name]
                 self.set_selected_geometry(geometry, append=is_multiselection)
                 self.iren.GetInteractorStyle().set_selected_nodes(geometry.actor_nodes, append=is_multiselection)
                 self.iren.GetInteractorStyle().highlight_actor(geometry.actor_nodes)
@@ -694,23 +736,14 @@ class MainWindow(QMainWindow):
         self.update_label_continuity()
         self.update_label_order()
         
-        self.ren.Render()
-        self.iren.Render()
+        self.schedule_flush()
     
     def select_in_listview(self, geometry: Geometry) -> None:
         """Highlight the given geometry in the list view."""
-        for i in range(self.listview_model.rowCount()):
-            index = self.listview_model.index(i, 0)
-            name = self.listview_model.data(index, Qt.DisplayRole)
-            if name == str(geometry):
-                # Changing the list view's selection here emits the selectionChanged signal, which calls its connected slot.
-                self.listview.selectionModel().select(index, QItemSelectionModel.Select)
-    
-    def get_geometry_of_actor(self, actor: vtk.vtkActor) -> Geometry:
-        """Return the Geometry object that contains the given actor, or return None if it does not exist."""
-        for geometry in self.geometries:
-            if actor in geometry.get_actors():
-                return geometry
+        row_index = self.listview_model.stringList().index(geometry.name)
+        index = self.listview_model.index(row_index, 0)
+        # Changing the list view's selection here emits the selectionChanged signal, which calls its connected slot.
+        self.listview.selectionModel().select(index, QItemSelectionModel.Select)
     
     def set_selected_point(self, point_id: int = None) -> None:
         """Set the point ID as the current selection."""
@@ -732,6 +765,17 @@ class MainWindow(QMainWindow):
         self.update_label_continuity()
         self.update_label_order()
 
+        # Prevent the valueChanged signal from being emitted while changing the fields here.
+        for field in self.fields_loaded:
+            field.blockSignals(True)
+        try:
+            self.load_fields_values()
+        finally:
+            for field in self.fields_loaded:
+                field.blockSignals(False)
+    
+    def load_fields_values(self) -> None:
+        """Set the values and enabled states of the fields in the sidebar. Called by load_fields while the fields' signals are blocked."""
         if self.selected_geometry:
             is_multiple_selected = len(self.selected_geometry) >= 2
             # If multiple geometries are selected, load the most recently selected geometry.
@@ -749,17 +793,9 @@ class MainWindow(QMainWindow):
                 self.fields_cp.setEnabled(not is_multiple_selected)
                 if not is_multiple_selected:
                     point = geometry.get_point(self.selected_point)
-                    self.fields_cp.setEnabled(True)
-                    # Prevent the valueChanged signal from being emitted while changing the fields here.
-                    self.field_x.blockSignals(True)
-                    self.field_y.blockSignals(True)
-                    self.field_z.blockSignals(True)
                     self.field_x.setValue(point[0])
                     self.field_y.setValue(point[1])
                     self.field_z.setValue(point[2])
-                    self.field_x.blockSignals(False)
-                    self.field_y.blockSignals(False)
-                    self.field_z.blockSignals(False)
             else:
                 self.fields_cp.setEnabled(False)
             
@@ -772,26 +808,16 @@ class MainWindow(QMainWindow):
             self.label_order.setVisible(not is_all_order_modifiable)
             self.button_delete.setEnabled(True)
 
-            self.field_cp_u.blockSignals(True)
-            self.field_cp_v.blockSignals(True)
             self.field_cp_u.setValue(geometry.get_number_cp_u())
             if is_surface:
                 self.field_cp_v.setValue(geometry.get_number_cp_v())
-            self.field_cp_u.blockSignals(False)
-            self.field_cp_v.blockSignals(False)
 
-            self.field_nodes_u.blockSignals(True)
-            self.field_nodes_v.blockSignals(True)
             self.field_nodes_u.setValue(geometry.number_u)
             if is_surface:
                 self.field_nodes_v.setValue(geometry.number_v)
-            self.field_nodes_u.blockSignals(False)
-            self.field_nodes_v.blockSignals(False)
 
             if isinstance(geometry, BSpline):
-                self.field_order.blockSignals(True)
                 self.field_order.setValue(geometry.get_order())
-                self.field_order.blockSignals(False)
         else:
             for fields in (self.fields_cp, self.fields_number_cp, self.fields_number_nodes, self.fields_order):
                 fields.setEnabled(False)
@@ -817,11 +843,13 @@ class MainWindow(QMainWindow):
     def set_camera_fit(self) -> None:
         """Adjust the camera so that the selected geometries, or all geometries if none are selected, are visible."""
         if self.selected_geometry:
-            data_combined = vtk.vtkAppendPoints()
-            for geometry in self.selected_geometry:
-                data_combined.AddInputData(geometry.actor_cp.GetMapper().GetInput())
-            data_combined.Update()
-            self.ren.ResetCamera(data_combined.GetOutput().GetBounds())
+            # Combine the bounds of each geometry's control points instead of appending all of their points.
+            bounds = np.array([geometry.actor_cp.GetMapper().GetInput().GetBounds() for geometry in self.selected_geometry])
+            self.ren.ResetCamera(
+                bounds[:, 0].min(), bounds[:, 1].max(),
+                bounds[:, 2].min(), bounds[:, 3].max(),
+                bounds[:, 4].min(), bounds[:, 5].max(),
+            )
         else:
             self.ren.ResetCamera()
         self.iren.Render()
@@ -835,9 +863,12 @@ class MainWindow(QMainWindow):
         Hermite.hermite_tangent_scaling = value
         for geometry in self.geometries:
             if isinstance(geometry, Hermite):
-                geometry.update()
-        self.ren.Render()
-        self.iren.Render()
+                geometry.update(defer=True)
+        self.schedule_flush()
+    
+    def update_mouse_modifier(self, value: float) -> None:
+        """Update the value that mouse positions are multiplied by in the interactor style."""
+        self.iren.GetInteractorStyle().set_mouse_modifier(value)
     
     def keyPressEvent(self, event: QKeyEvent) -> None:
         """Define actions for key presses. This overrides the parent class method."""
@@ -850,25 +881,31 @@ class MainWindow(QMainWindow):
         cp_2 = np.array([[[7.5,7.5,0], [8.2,8.2,0], [11,7,0], [14,6,0]]]).transpose()
         cp_3 = np.array([[[14,6,0], [17,5,0], [20,10,0], [23,15,0]]]).transpose()
         number_u = self.settings_field_nodes.value()
-        self.add_geometry(BezierCurve(cp_1, number_u))
-        self.add_geometry(BezierCurve(cp_2, number_u))
-        self.add_geometry(BezierCurve(cp_3, number_u))
+        self.add_geometries([
+            BezierCurve(cp_1, number_u),
+            BezierCurve(cp_2, number_u),
+            BezierCurve(cp_3, number_u),
+        ])
     
     def preset_2(self):
         """Add two preset Bézier surfaces with C1 continuity."""
         cp_1 = np.array([[[0,20,0], [8,21,5], [18,23,0]], [[0,17,0], [8,17,6], [18,17,3]], [[0,14,0], [8,14,6], [18,14,4]]]).transpose((2,0,1))
         cp_2 = np.array([[[0,14,0], [8,14,6], [18,14,4]], [[0,11,0], [8,11,6], [18,11,5]], [[0,0,0], [8,0,0], [18,0,0]]]).transpose((2,0,1))
         number_u = number_v = self.settings_field_nodes.value()
-        self.add_geometry(BezierSurface(cp_1, number_u, number_v))
-        self.add_geometry(BezierSurface(cp_2, number_u, number_v))
+        self.add_geometries([
+            BezierSurface(cp_1, number_u, number_v),
+            BezierSurface(cp_2, number_u, number_v),
+        ])
     
     def preset_3(self):
         """Add two preset Hermite curves with C2 continuity."""
         cp_1 = np.array([[[1,5,0], [3,8,0], [3,3,0], [1.9286,-1.2321,0]]]).transpose()
         cp_2 = np.array([[[3,8,0], [6,4,0], [1.9286,-1.2321,0], [4.2857,-1.0714,0]]]).transpose()
         number_u = self.settings_field_nodes.value()
-        self.add_geometry(HermiteCurve(cp_1, number_u))
-        self.add_geometry(HermiteCurve(cp_2, number_u))
+        self.add_geometries([
+            HermiteCurve(cp_1, number_u),
+            HermiteCurve(cp_2, number_u),
+        ])
     
     def preset_4(self):
         """Add two preset Hermite surfaces with some continuity."""
@@ -885,8 +922,10 @@ class MainWindow(QMainWindow):
             [[21,0,0], [21,10,0], [20,0,1], [20,10,1]],
         ]).transpose((2,0,1))
         number_u = number_v = self.settings_field_nodes.value()
-        self.add_geometry(HermiteSurface(cp_1, number_u, number_v))
-        self.add_geometry(HermiteSurface(cp_2, number_u, number_v))
+        self.add_geometries([
+            HermiteSurface(cp_1, number_u, number_v),
+            HermiteSurface(cp_2, number_u, number_v),
+        ])
 
     def preset_4_1(self):
         print("Homework 4, Bezier curve")